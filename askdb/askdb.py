@@ -6,32 +6,113 @@ Created on Thu Feb 13 13:25:31 2025
 @author: bhanuprasadthota
 """
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from functools import lru_cache
+import os
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM
 import sqlite3
 
+# fp16 halves memory traffic on GPU; CPU kernels are still fastest in fp32
+DTYPE = torch.float16 if torch.cuda.is_available() else torch.float32
+
+# Greedy decoding with a fixed token budget; also used as-is for CPU and ONNX Runtime models
+GENERATE_KWARGS = dict(max_new_tokens=128, do_sample=False)
+# On CUDA a static KV cache keeps shapes fixed, which lets transformers compile the decoding
+# step instead of retracing it every call. Auto-compile is CUDA-only, so on CPU it would
+# only preallocate the cache.
+CUDA_GENERATE_KWARGS = dict(GENERATE_KWARGS, cache_implementation="static")
+
+# Root of the exports written by `python -m askdb.export`: $ASKDB_ONNX_DIR, or a fixed per-user
+# cache directory, so the backend doesn't depend on the caller's working directory
+ONNX_ROOT = os.environ.get("ASKDB_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "askdb", "onnx"))
+# int8 ONNX Runtime export used instead of the PyTorch model on CPU when present
+ORT_MODEL_DIR = os.path.join(ONNX_ROOT, "sqlcoder")
+
+
+@lru_cache(maxsize=2)
+def _load_model(model_name, ort_model_dir=None):
+    """
+    Loads the tokenizer and model once per process so every AskDB instance shares them.
+
+    Returns (tokenizer, model, generate_kwargs). An ONNX Runtime export in
+    `ort_model_dir` is preferred over the PyTorch checkpoint on CPU when it exists.
+    """
+    # The export is int8-quantized for CPU; on CUDA the fp16 PyTorch model is faster
+    if ort_model_dir and os.path.isdir(ort_model_dir) and not torch.cuda.is_available():
+        from optimum.onnxruntime import ORTModelForCausalLM  # Only needed for exported models
+        tokenizer = AutoTokenizer.from_pretrained(ort_model_dir)
+        model = ORTModelForCausalLM.from_pretrained(ort_model_dir)
+        return tokenizer, model, GENERATE_KWARGS
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # sqlcoder is a decoder-only model, so it has to be loaded as a causal LM
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=DTYPE,
+        device_map="auto"
+    )
+    model.config.use_cache = True  # Reuse past keys/values while decoding
+    if not torch.cuda.is_available():
+        # int8 weights for the Linear layers cut memory traffic and use int8 GEMMs on CPU;
+        # inplace skips the deep copy of the fp32 model, which would double peak RAM
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return tokenizer, model, GENERATE_KWARGS
+
+    # Warm up once with a prompt shaped like convert_to_sql's, so the first real
+    # question doesn't pay the compile cost
+    warmup = tokenizer("Convert to SQL: Show all employees", return_tensors="pt").to(model.device)
+    with torch.inference_mode():
+        model.generate(**warmup, **CUDA_GENERATE_KWARGS)
+    return tokenizer, model, CUDA_GENERATE_KWARGS
+
+
 class AskDB:
     def __init__(self, db_path="askdb.db"):
-        self.tokenizer = AutoTokenizer.from_pretrained("defog/sqlcoder")
-        self.model = AutoModelForSeq2SeqLM.from_pretrained("defog/sqlcoder")
+        self.tokenizer, self.model, self.generate_kwargs = _load_model("defog/sqlcoder", ORT_MODEL_DIR)
         self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
 
+    @torch.inference_mode()  # No autograd bookkeeping: gradients are never needed here
     def convert_to_sql(self, question):
-        inputs = self.tokenizer(f"Convert to SQL: {question}", return_tensors="pt")
-        outputs = self.model.generate(**inputs)
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        inputs = self.tokenizer(f"Convert to SQL: {question}", return_tensors="pt").to(self.model.device)
+        outputs = self.model.generate(**inputs, **self.generate_kwargs)
+        # A causal LM echoes the prompt, so only decode the newly generated tokens
+        prompt_length = inputs["input_ids"].shape[1]
+        return self.tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True)
 
-    def execute_query(self, question):
+    def execute_query(self, question, chunk_size=1000):
+        """
+        Runs the SQL generated for `question`.
+
+        Returns either an iterator over the result rows or, if the query fails to
+        execute, a dict of the form {"error": message} - check with isinstance(result, dict).
+        Rows are fetched `chunk_size` at a time, so memory stays bounded even for huge
+        result sets; wrap the iterator in list() to get every row at once.
+        Each call uses its own cursor, so several iterators can be consumed side by side.
+        """
         sql_query = self.convert_to_sql(question)
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute(sql_query)
-            results = self.cursor.fetchall()
-            return results
+            cursor.arraysize = chunk_size
+            cursor.execute(sql_query)
         except Exception as e:
+            cursor.close()
             return {"error": str(e)}
+        return self._iter_rows(cursor, chunk_size)
+
+    def _iter_rows(self, cursor, chunk_size):
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
 
 # Example usage
 if __name__ == "__main__":
+    torch.set_grad_enabled(False)
     askdb = AskDB()
     question = "Show all employees with salary above 50000"
-    print(askdb.execute_query(question))
+    results = askdb.execute_query(question)
+    print(results if isinstance(results, dict) else list(results))
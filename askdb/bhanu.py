@@ -1,3 +1,5 @@
+import re
+import torch
 from transformers import T5Tokenizer, T5ForConditionalGeneration
 
 # Load model and tokenizer
@@ -5,32 +7,54 @@ model_name = "ThotaBhanu/t5_sql_askdb"
 tokenizer = T5Tokenizer.from_pretrained(model_name)
 model = T5ForConditionalGeneration.from_pretrained(model_name)
 
+# Everything up to the last 'human_readable': key, or from the first 'sel' key onwards
+UNWANTED_PARTS = re.compile(r"^.*'human_readable':|'sel'.*$", re.DOTALL)
+
 # Function to convert natural language query to clean SQL
 def generate_sql(query):
-    input_text = f"Convert to SQL: {query}"
-    inputs = tokenizer(input_text, return_tensors="pt")
+    return generate_sql_batch([query])[0]
+
+# Function to convert many natural language queries in a single batched model call
+@torch.inference_mode()  # No autograd bookkeeping: gradients are never needed here
+def generate_sql_batch(queries):
+    if not queries:
+        return []
+
+    input_texts = [f"Convert to SQL: {query}" for query in queries]
+    inputs = tokenizer(input_texts, padding=True, return_tensors="pt")
 
     output = model.generate(
         **inputs,
         max_length=128,
-        num_beams=4,
-        early_stopping=True
+        num_beams=1,  # Greedy decoding: beam search costs one forward pass per beam
+        use_cache=True
     )
 
-    result = tokenizer.decode(output[0], skip_special_tokens=True)
+    results = tokenizer.batch_decode(output, skip_special_tokens=True)
+    return [clean_sql(result) for result in results]
+
+# Function to strip the structured leftovers the model emits around the SQL
+def clean_sql(result):
+    """
+    Removes structured parts like 'sel', 'agg', etc. around the SQL in a single pass.
 
-    # Clean unwanted structured parts like 'sel', 'agg', etc.
-    if "'human_readable':" in result:
-        result = result.split("'human_readable':")[-1].strip(" '\"{},\n")
-    if "', 'sel'" in result:
-        result = result.split("', 'sel'")[0].strip(" '\"{},\n")
-    if "'sel'" in result:
-        result = result.split("'sel'")[0].strip(" '\"{},\n")
+    Output without those markers is returned untouched, so trailing string literals survive:
 
-    return result
+    >>> clean_sql("{'human_readable': 'SELECT name FROM employees', 'sel': 1, 'agg': 0}")
+    'SELECT name FROM employees'
+    >>> clean_sql("SELECT * FROM employees', 'sel': 3")
+    'SELECT * FROM employees'
+    >>> clean_sql("SELECT * FROM employees WHERE name = 'Bob'")
+    "SELECT * FROM employees WHERE name = 'Bob'"
+    >>> clean_sql('SELECT * FROM employees WHERE joined = "2020"')
+    'SELECT * FROM employees WHERE joined = "2020"'
+    """
+    cleaned, replacements = UNWANTED_PARTS.subn("", result)
+    return cleaned.strip(" '\"{},\n") if replacements else result
 
 # Example usage
 if __name__ == "__main__":
+    torch.set_grad_enabled(False)
     query = "Find all employees who joined in 2020"
     sql_query = generate_sql(query)
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exports the AskDB models to int8 ONNX Runtime graphs so CPU inference runs a
+pre-optimized, quantized graph instead of interpreting the PyTorch model on every call.
+
+Run once after installing (requires `pip install optimum[onnxruntime]`):
+
+    python -m askdb.export
+
+The exports are written under $ASKDB_ONNX_DIR (default: ~/.cache/askdb/onnx), where
+askdb.py and schema.py look for them; they are only used on CPU-only hosts.
+"""
+
+from glob import glob
+import os
+import tempfile
+from transformers import AutoTokenizer
+
+# Same lookup as ONNX_ROOT in askdb.py / schema.py
+ONNX_ROOT = os.environ.get("ASKDB_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "askdb", "onnx"))
+
+# Sub-directory of ONNX_ROOT -> (Hugging Face model, task); names match ORT_MODEL_DIR in askdb.py / schema.py
+EXPORTS = {
+    "sqlcoder": ("defog/sqlcoder", "causal-lm"),
+    "t5_sql_askdb": ("ThotaBhanu/t5_sql_askdb", "seq2seq-lm"),
+}
+
+
+def export_model(model_name, task, output_dir):
+    """
+    Exports `model_name` to ONNX, quantizes it to dynamic int8 and saves it,
+    with its tokenizer, to `output_dir`.
+    """
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model_class = ORTModelForCausalLM if task == "causal-lm" else ORTModelForSeq2SeqLM
+    model = model_class.from_pretrained(model_name, export=True)
+
+    # Weights are quantized ahead of time and activations at runtime, matching the
+    # int8 dynamic quantization the PyTorch loaders apply on CPU
+    quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    with tempfile.TemporaryDirectory() as fp32_dir:
+        model.save_pretrained(fp32_dir)
+        # A seq2seq export has several graphs (encoder, decoders); quantize each one and
+        # keep its original file name so the loaders find them without extra arguments
+        for onnx_file in glob(os.path.join(fp32_dir, "*.onnx")):
+            quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=os.path.basename(onnx_file))
+            quantizer.quantize(
+                save_dir=output_dir,
+                quantization_config=quantization_config,
+                file_suffix="",
+                use_external_data_format=True  # sqlcoder is well past protobuf's 2 GB limit
+            )
+
+    model.config.save_pretrained(output_dir)
+    model.generation_config.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    print(f"✅ Exported `{model_name}` (int8) to {output_dir}")
+
+
+if __name__ == "__main__":
+    for name, (model_name, task) in EXPORTS.items():
+        export_model(model_name, task, os.path.join(ONNX_ROOT, name))
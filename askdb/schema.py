@@ -1,17 +1,135 @@
 import psycopg2  # PostgreSQL
+import psycopg2.pool  # PostgreSQL connection pooling
 import pymysql  # MySQL
+from dbutils.pooled_db import PooledDB  # MySQL connection pooling
 import sqlite3  # SQLite
 from pymongo import MongoClient  # MongoDB
+import torch
 from transformers import T5Tokenizer, T5ForConditionalGeneration
-from fuzzywuzzy import fuzz, process  # Fuzzy matching for column names
+from rapidfuzz import fuzz, process, utils  # Fuzzy matching for column names
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+import copy
+import os
+import re
+import threading
+
+# Connection pools shared by every AskDB instance, keyed by connection settings
+_pools = {}
+_pools_lock = threading.Lock()
+POOL_MAX_CONNECTIONS = 50
+
+# PRAGMA and DESCRIBE can't take bound parameters, so table names are validated instead
+_TABLE_NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Root of the exports written by `python -m askdb.export`: $ASKDB_ONNX_DIR, or a fixed per-user
+# cache directory, so the backend doesn't depend on the caller's working directory
+ONNX_ROOT = os.environ.get("ASKDB_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "askdb", "onnx"))
+# int8 ONNX Runtime export used instead of the PyTorch model on CPU when present
+ORT_MODEL_DIR = os.path.join(ONNX_ROOT, "t5_sql_askdb")
+
+# Fixed start of every prompt; it is tokenized once per instance instead of on every call
+PROMPT_PREFIX = "Convert this natural language query into a SQL query:\nUser Query:"
+
+# With the static cache, prompts are padded up to one of these lengths so compiled/captured decode steps get reused
+PROMPT_LENGTH_BUCKETS = (64, 128, 256)
+
+# Greedy decoding with a fixed token budget keeps every decode step the same shape
+GENERATION_SETTINGS = dict(max_new_tokens=50, num_beams=1, do_sample=False, use_cache=True)
+
+# Shorter words are too ambiguous to resolve as a column-name prefix
+MIN_PREFIX_LENGTH = 3
+
+# Per-table data derived once from the schema and reused by every query on that table
+TableMetadata = namedtuple("TableMetadata", [
+    "schema",             # [(column_name, data_type), ...] as returned by get_schema
+    "column_names",       # Column names in schema order
+    "processed_columns",  # Column names normalized once for fuzzy matching
+    "column_lookup",      # Normalized name -> column name, for exact matches
+    "schema_info",        # "name (type), ..." string used in the prompt
+])
+
+
+def _build_table_metadata(schema):
+    """Builds the TableMetadata for a non-empty schema."""
+    column_names = [col[0] for col in schema]
+    processed_columns = [utils.default_process(col) for col in column_names]
+    column_lookup = {}
+    for processed, column in zip(processed_columns, column_names):
+        column_lookup.setdefault(processed, column)
+    return TableMetadata(
+        schema=schema,
+        column_names=column_names,
+        processed_columns=processed_columns,
+        column_lookup=column_lookup,
+        schema_info=", ".join([f"{col[0]} ({col[1]})" for col in schema])
+    )
+
+
+def _get_pool(key, create_pool):
+    """Returns the pool for `key`, creating it on first use."""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = create_pool()
+        return _pools[key]
+
+
+@lru_cache(maxsize=2)
+def _load_model(model_name, ort_model_dir=None):
+    """
+    Loads the T5 tokenizer and model once per process so every AskDB instance shares them.
+
+    Returns (tokenizer, model, generation_config). An ONNX Runtime export in
+    `ort_model_dir` is preferred over the PyTorch checkpoint on CPU when it exists.
+    """
+    # The export is int8-quantized for CPU; on CUDA the bf16 PyTorch model is faster
+    if ort_model_dir and os.path.isdir(ort_model_dir) and not torch.cuda.is_available():
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM  # Only needed for exported models
+        tokenizer = T5Tokenizer.from_pretrained(ort_model_dir)
+        model = ORTModelForSeq2SeqLM.from_pretrained(ort_model_dir)
+        # ORT models manage their own KV cache, so no static cache here
+        generation_config = copy.deepcopy(model.generation_config)
+        generation_config.update(**GENERATION_SETTINGS)
+        return tokenizer, model, generation_config
+
+    tokenizer = T5Tokenizer.from_pretrained(model_name)
+    # Fused SDPA attention avoids materializing the full attention matrix, where the installed T5 supports it
+    attn_implementation = "sdpa" if T5ForConditionalGeneration._supports_sdpa else "eager"
+    if torch.cuda.is_available():
+        # bf16 halves memory traffic per attention/GEMM op and, unlike fp16, doesn't overflow in T5
+        model = T5ForConditionalGeneration.from_pretrained(
+            model_name,
+            torch_dtype=torch.bfloat16,
+            attn_implementation=attn_implementation
+        ).to("cuda")
+    else:
+        model = T5ForConditionalGeneration.from_pretrained(model_name, attn_implementation=attn_implementation)
+        # int8 weights for the Linear layers cut memory traffic and use int8 GEMMs on CPU;
+        # inplace skips the deep copy of the fp32 model, which would double peak RAM
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    # Start from the model's own config so T5's start/end/pad token ids are kept
+    generation_config = copy.deepcopy(model.generation_config)
+    generation_config.update(**GENERATION_SETTINGS)
+    if torch.cuda.is_available():
+        # The static cache lets transformers compile and graph-capture each decode step;
+        # auto-compile is CUDA-only, so on CPU it would only preallocate the cache
+        generation_config.update(cache_implementation="static")
+    return tokenizer, model, generation_config
 
 
 class AskDB:
-    def __init__(self, db_type, database_name, host="localhost", port=None, username=None, password=None, collection_name=None, uri=None):
+    def __init__(self, db_type, database_name, host="localhost", port=None, username=None, password=None, collection_name=None, uri=None, sqlite_wal=False):
         """
         Initializes the AskDB class to support multiple database types.
 
         Supported Databases: PostgreSQL, MySQL, SQLite, MongoDB.
+
+        `sqlite_wal=True` switches a SQLite database to WAL journaling so readers don't block
+        on writers. Unlike the other connection settings this is stored in the database file
+        itself (and creates -wal/-shm files next to it), so it stays on for every later
+        connection; it is off by default because AskDB only reads the schema.
         """
         self.db_type = db_type.lower()
         self.database_name = database_name
@@ -21,7 +139,13 @@ class AskDB:
         self.password = password
         self.collection_name = collection_name
         self.uri = uri  # Only for MongoDB
-        self.connection = None  # Placeholder for the connection object
+        self.sqlite_wal = sqlite_wal  # Only for SQLite
+        self.connection = None  # Placeholder for the connection object (SQLite/MongoDB)
+        self.pool = None  # Shared connection pool; connections are borrowed per operation (PostgreSQL/MySQL)
+        self.cursor = None  # Kept open for the lifetime of the SQLite connection
+        self.lock = threading.Lock()  # Serializes use of the shared SQLite connection/cursor across threads
+        # table_name -> TableMetadata
+        self._schema_cache = {}
 
         # ✅ Automatically set default ports for known databases
         self.set_default_ports()
@@ -30,8 +154,8 @@ class AskDB:
         self.connect()
 
         # ✅ Load fine-tuned T5 Model
-        self.tokenizer = T5Tokenizer.from_pretrained("ThotaBhanu/t5_sql_askdb")
-        self.model = T5ForConditionalGeneration.from_pretrained("ThotaBhanu/t5_sql_askdb")
+        self.tokenizer, self.model, self.generation_config = _load_model("ThotaBhanu/t5_sql_askdb", ORT_MODEL_DIR)
+        self._prefix_ids = self.tokenizer(PROMPT_PREFIX, add_special_tokens=False).input_ids
 
     def set_default_ports(self):
         """Assigns default ports based on the database type."""
@@ -49,29 +173,37 @@ class AskDB:
 
     def connect(self):
         """Creates a connection to the specified database."""
+        pool_key = (self.db_type, self.host, self.port, self.username, self.password, self.database_name)
         try:
             if self.db_type == "postgresql":
-                self.connection = psycopg2.connect(
+                # minconn=1 opens a connection right away, so bad settings fail here
+                self.pool = _get_pool(pool_key, lambda: psycopg2.pool.ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=POOL_MAX_CONNECTIONS,
                     host=self.host,
                     port=self.port,
                     user=self.username,
                     password=self.password,
                     dbname=self.database_name
-                )
+                ))
             elif self.db_type == "mysql":
-                self.connection = pymysql.connect(
+                self.pool = _get_pool(pool_key, lambda: PooledDB(
+                    creator=pymysql,
+                    mincached=1,  # Open a connection right away, so bad settings fail here
+                    maxconnections=POOL_MAX_CONNECTIONS,
+                    blocking=False,  # Raise when exhausted, like psycopg2's pool, instead of hanging
                     host=self.host,
                     port=self.port,
                     user=self.username,
                     password=self.password,
                     database=self.database_name
-                )
+                ))
             elif self.db_type == "mongodb":
                 self.connection = MongoClient(self.uri or f"mongodb://{self.username}:{self.password}@{self.host}:{self.port}")
                 print(f"✅ Connected to MongoDB database: {self.database_name}")
                 return  # MongoDB does not use a cursor like SQL-based DBs
             elif self.db_type == "sqlite":
-                self.connection = sqlite3.connect(self.database_name)  # Just the file path
+                self.connection, self.cursor = self.open_sqlite()
             else:
                 raise ValueError(f"❌ Unsupported database type: {self.db_type}")
 
@@ -80,55 +212,155 @@ class AskDB:
         except Exception as e:
             print(f"❌ Connection failed: {str(e)}")
 
+    def open_sqlite(self):
+        """
+        Opens the SQLite connection and its shared cursor.
+
+        Nothing is kept if any step fails, so a failed connect leaves the instance disconnected.
+        """
+        # Just the file path; self.lock makes it safe to share across request threads
+        connection = sqlite3.connect(self.database_name, check_same_thread=False)
+        try:
+            # Per-connection settings only: NORMAL sync skips the fsync per commit, and
+            # memory-mapped I/O plus a 64 MB page cache keep hot pages out of syscalls
+            connection.executescript("""
+                PRAGMA synchronous=NORMAL;
+                PRAGMA mmap_size=268435456;
+                PRAGMA cache_size=-65536;
+                PRAGMA temp_store=MEMORY;
+            """)
+            if self.sqlite_wal:
+                # Persistent: stored in the database file (see __init__)
+                connection.execute("PRAGMA journal_mode=WAL")
+            return connection, connection.cursor()
+        except Exception:
+            connection.close()
+            raise
+
+    def is_connected(self):
+        """Returns True if there is a connection (or a connection pool) to query."""
+        return self.connection is not None or self.pool is not None
+
+    @contextmanager
+    def borrow_cursor(self):
+        """
+        Yields a cursor for a single operation.
+
+        PostgreSQL/MySQL borrow a pooled connection only for the duration of the block, so
+        instances never hold on to one; SQLite shares its single cursor under the lock.
+        """
+        if self.pool is None:
+            with self.lock:
+                yield self.cursor
+            return
+
+        connection = self.pool.getconn() if self.db_type == "postgresql" else self.pool.connection()
+        cursor = connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            if self.db_type == "postgresql":
+                self.pool.putconn(connection)
+            else:
+                connection.close()  # PooledDB connections go back to the pool on close()
+
     def get_schema(self, table_name):
-        """Retrieves the table schema from the database."""
-        if not self.connection:
+        """Retrieves the table schema from the database (cached per table)."""
+        if table_name in self._schema_cache:
+            return self._schema_cache[table_name].schema
+
+        if not self.is_connected():
             print("❌ Error: No active database connection.")
             return None
 
+        if self.db_type in ("sqlite", "mysql") and not _TABLE_NAME_PATTERN.fullmatch(table_name):
+            print(f"❌ Invalid table name: {table_name!r}")
+            return None
+
         try:
-            cursor = self.connection.cursor()
-
-            if self.db_type == "sqlite":
-                cursor.execute(f"PRAGMA table_info({table_name})")  # ✅ SQLite Schema Query
-                schema = [(row[1], row[2]) for row in cursor.fetchall()]  # (column_name, data_type)
-            elif self.db_type == "postgresql":
-                cursor.execute(f"""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = '{table_name}'
-                """)
-                schema = cursor.fetchall()
-            elif self.db_type == "mysql":
-                cursor.execute(f"DESCRIBE {table_name}")
-                schema = [(row[0], row[1]) for row in cursor.fetchall()]
-            else:
-                print("❌ Schema fetching is not supported for MongoDB.")
-                return None
+            with self.borrow_cursor() as cursor:
+                if self.db_type == "sqlite":
+                    cursor.execute(f"PRAGMA table_info({table_name})")  # ✅ SQLite Schema Query
+                    schema = [(row[1], row[2]) for row in cursor.fetchall()]  # (column_name, data_type)
+                elif self.db_type == "postgresql":
+                    cursor.execute(
+                        """
+                        SELECT column_name, data_type
+                        FROM information_schema.columns
+                        WHERE table_name = %s
+                        """,
+                        (table_name,)
+                    )
+                    schema = cursor.fetchall()
+                elif self.db_type == "mysql":
+                    cursor.execute(f"DESCRIBE {table_name}")
+                    schema = [(row[0], row[1]) for row in cursor.fetchall()]
+                else:
+                    print("❌ Schema fetching is not supported for MongoDB.")
+                    return None
 
-            cursor.close()
             print(f"✅ Retrieved schema for `{table_name}`: {schema}")
+
+            if schema:
+                self._schema_cache[table_name] = _build_table_metadata(schema)
             return schema
 
         except Exception as e:
             print(f"❌ Error retrieving schema: {str(e)}")
             return None
 
-    def match_columns(self, user_query, table_name):
-        """Matches user query words with table column names using fuzzy matching."""
-        schema = self.get_schema(table_name)
+    def match_columns(self, user_query, table_name, schema=None):
+        """
+        Matches user query words with table column names using fuzzy matching.
+
+        Pass `schema` when the caller already fetched it to skip the lookup. A schema
+        that differs from the cached one is only used for this call; the cache is
+        filled by get_schema alone.
+        """
+        if schema is None:
+            schema = self.get_schema(table_name)
         if not schema:
             return None
     
-        column_names = [col[0] for col in schema]  # Extract column names
+        metadata = self._schema_cache.get(table_name)
+        if metadata is None or metadata.schema != schema:
+            metadata = _build_table_metadata(schema)
+        column_names = metadata.column_names
+        processed_columns = metadata.processed_columns
+        column_lookup = metadata.column_lookup
     
         matched_columns = set()  # Use a set to prevent duplicates
         query_words = user_query.lower().split()  # Convert query to lowercase for better matching
     
-        for word in query_words:
-            best_match, score = process.extractOne(word, column_names)
-            if score > 60:  # Acceptable fuzzy matching threshold
-                matched_columns.add(best_match)  # Use set to ensure unique column matches
+        # ⚡ Fast path: words that are a column name, or a prefix of exactly one, skip fuzzy scoring
+        fuzzy_words = []
+        for word in map(utils.default_process, query_words):
+            if not word:
+                continue
+            if word in column_lookup:
+                matched_columns.add(column_lookup[word])
+                continue
+            prefix_matches = []
+            if len(word) >= MIN_PREFIX_LENGTH:
+                prefix_matches = [i for i, col in enumerate(processed_columns) if col.startswith(word)]
+            if len(prefix_matches) == 1:
+                matched_columns.add(column_names[prefix_matches[0]])
+            else:
+                fuzzy_words.append(word)  # No or ambiguous prefix match: let the scorer pick the best column
+    
+        # Score the remaining words against every column in one native call: rows are words, columns are columns
+        scores = process.cdist(
+            fuzzy_words,
+            processed_columns,
+            scorer=fuzz.WRatio,
+            processor=None,  # Both sides are already normalized
+            score_cutoff=60
+        ) if fuzzy_words else []
+        for row in scores:
+            best = row.argmax()
+            if row[best] > 60:  # Acceptable fuzzy matching threshold
+                matched_columns.add(column_names[best])  # Use set to ensure unique column matches
     
         matched_columns = list(matched_columns)  # Convert set back to list
     
@@ -140,7 +372,7 @@ class AskDB:
         """
         Generates an SQL query from a natural language query.
         """
-        if not self.connection:
+        if not self.is_connected():
             print("❌ Error: No active database connection.")
             return None
     
@@ -150,63 +382,119 @@ class AskDB:
             print("❌ Failed to retrieve schema.")
             return None
     
-        print(f"✅ Retrieved schema for `{table_name}`: {schema}")
-    
-        # 🔍 Match columns
-        matched_columns = self.match_columns(user_query, table_name)
-        print(f"🔍 Matched Columns: {matched_columns}")
+        # 🔍 Match columns (reusing the schema fetched above)
+        matched_columns = self.match_columns(user_query, table_name, schema)
     
         if not matched_columns:
             print("❌ No relevant columns matched. SQL generation may be inaccurate.")
         
         # ✅ Explicitly format column names to prevent misinterpretation
-        schema_info = ", ".join([f"{col[0]} ({col[1]})" for col in schema])  # Include column names + types
+        schema_info = self._schema_cache[table_name].schema_info  # Include column names + types
         matched_info = ", ".join(matched_columns) if matched_columns else schema_info  # Use best-matched columns
     
         # ✅ Construct a strict schema-aware prompt
-        prompt = (
-            f"Convert this natural language query into a SQL query:\n"
-            f"User Query: {user_query}\n"
-            f"Table Name: {table_name}\n"
-            f"Available Columns: {schema_info}\n"
-            f"Use only these columns in the SQL query."
-        )
+        prompt = self.build_prompt(user_query, table_name, schema_info)
     
         # 🔍 Debugging: Print the final prompt being sent to the model
-        print(f"🚀 **Final Prompt:** {prompt}")
+        print(f"🚀 **Final Prompt:** {PROMPT_PREFIX}{prompt}")
     
         # 🔥 Generate SQL
-        input_ids = self.tokenizer(prompt, return_tensors="pt").input_ids
-        output = self.model.generate(input_ids, max_new_tokens=50)
-        generated_sql = self.tokenizer.decode(output[0], skip_special_tokens=True)
+        generated_sql = self.run_model([prompt])[0]
     
         # 🔍 Print SQL before execution
         print(f"🛠 **Generated SQL:** {generated_sql}")
     
         return generated_sql
 
+    def generate_sql_batch(self, user_queries, table_name):
+        """
+        Generates SQL queries for several natural language queries against the same table.
+
+        All prompts go through the model in a single padded batch, which is much
+        faster than calling generate_sql once per query.
+        """
+        if not user_queries:
+            return []
+
+        if not self.is_connected():
+            print("❌ Error: No active database connection.")
+            return None
+
+        if not self.get_schema(table_name):
+            print("❌ Failed to retrieve schema.")
+            return None
+
+        schema_info = self._schema_cache[table_name].schema_info
+        prompts = [self.build_prompt(user_query, table_name, schema_info) for user_query in user_queries]
+        return self.run_model(prompts)
+
+    def build_prompt(self, user_query, table_name, schema_info):
+        """Builds the variable part of the strict schema-aware prompt, which follows PROMPT_PREFIX."""
+        return (
+            f" {user_query}\n"
+            f"Table Name: {table_name}\n"
+            f"Available Columns: {schema_info}\n"
+            f"Use only these columns in the SQL query."
+        )
+
+    def run_model(self, prompts):
+        """Runs a batch of prompts (from build_prompt) through the T5 model and returns the decoded SQL strings."""
+        if not prompts:
+            return []
+
+        # Only the variable part is tokenized; the cached prefix ids are prepended to each row
+        input_ids = [self._prefix_ids + ids for ids in self.tokenizer(prompts).input_ids]
+        longest = max(len(ids) for ids in input_ids)
+        bucket = None
+        if self.generation_config.cache_implementation == "static":
+            bucket = next((size for size in PROMPT_LENGTH_BUCKETS if size >= longest), None)
+        inputs = self.tokenizer.pad(
+            {"input_ids": input_ids},
+            padding="max_length" if bucket else "longest",
+            max_length=bucket,
+            return_tensors="pt"
+        ).to(self.model.device)
+        with torch.inference_mode():
+            # Run the encoder once up front; the decoder then only attends to its cached outputs
+            encoder_outputs = self.model.get_encoder()(**inputs)
+            output = self.model.generate(
+                encoder_outputs=encoder_outputs,
+                attention_mask=inputs.attention_mask,
+                generation_config=self.generation_config
+            )
+        return self.tokenizer.batch_decode(output, skip_special_tokens=True)
+
 
 
 
     def close_connection(self):
-        """Closes the database connection."""
+        """Closes the database connection; pools are shared, so pooled instances just let go of theirs."""
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
         if self.connection:
             self.connection.close()
+            self.connection = None
+            print("🔌 Database connection closed.")
+        elif self.pool:
+            self.pool = None
             print("🔌 Database connection closed.")
 
 
 # --------------------- ✅ Usage Example ---------------------
 
-# ✅ 1️⃣ SQLite Example (Testing)
-askdb_sqlite = AskDB(
-    db_type="SQLite",
-    database_name="/Users/bhanuprasadthota/Downloads/example_db.sqlite"
-)
+if __name__ == "__main__":
+    torch.set_grad_enabled(False)
 
-# ✅ 2️⃣ Run SQL Generation
-user_query = "Find all employees who joined in 2020"
-print(askdb_sqlite.generate_sql(user_query, table_name="employees"))
+    # ✅ 1️⃣ SQLite Example (Testing)
+    askdb_sqlite = AskDB(
+        db_type="SQLite",
+        database_name="/Users/bhanuprasadthota/Downloads/example_db.sqlite"
+    )
 
-# ✅ Close Connection
-askdb_sqlite.close_connection()
+    # ✅ 2️⃣ Run SQL Generation
+    user_query = "Find all employees who joined in 2020"
+    print(askdb_sqlite.generate_sql(user_query, table_name="employees"))
 
+    # ✅ Close Connection
+    askdb_sqlite.close_connection()
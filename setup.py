@@ -12,7 +12,8 @@ setup(
     name="askdb",
     version="0.1.0",
     packages=find_packages(),
-    install_requires=["transformers", "sentencepiece"],
+    install_requires=["transformers", "sentencepiece", "torch", "accelerate", "rapidfuzz", "DBUtils"],
+    extras_require={"onnx": ["optimum[onnxruntime]"]},
     author="Bhanu Prasad Thota",
     description="A self-hosted NLP-based SQL query engine",
     url="https://github.com/bhanuprasadthota/AskDB",